@@ -1,7 +1,9 @@
 from flask import Flask, jsonify, request
-import subprocess
 import sys
 
+import image_frames
+import main_EmotionDetection
+
 app = Flask(__name__)
 
 @app.route('/run_app')
@@ -12,16 +14,19 @@ def process_video_and_run_main():
     if not video_path:
         return jsonify({"message": "Video path not provided."}), 400
 
-    # Run image_frames.py with the video path as an argument
-    print("Running image_frames.py...")
-    subprocess.run(["python", "image_frames.py", video_path])
+    # Sample the video's frames in-process rather than in a child interpreter
+    print("Sampling video frames...")
+    try:
+        image_frames.sample_frames(video_path, main_EmotionDetection.image_directory)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
 
-    # Run main.py
-    print("Running main.py...")
-    subprocess.run(["python", "main.py"])
+    # Score the frames in-process; the model stays loaded between requests
+    print("Running emotion analysis...")
+    result = main_EmotionDetection.analyze(main_EmotionDetection.image_directory)
     
     # You can return a JSON response or any other response here
-    return jsonify({"message": "Processing video and running main."})
+    return jsonify({"message": "Processing video and running main.", "result": result})
 
 @app.route('/')
 def hello_world():
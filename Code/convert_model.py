@@ -0,0 +1,40 @@
+"""
+One-time export of the Keras emotion CNN to ONNX, plus an FP16 copy for GPU inference
+and a dynamic INT8 quantization for CPU inference.
+The ONNX input is channels-first (N, 1, 48, 48), the layout cuDNN and TensorRT run fastest.
+main_EmotionDetection.py picks up emotion_int8.onnx automatically when onnxruntime is installed.
+"""
+
+import os
+import sys
+
+import onnx
+import tensorflow as tf
+import tf2onnx
+from keras.models import load_model
+from onnxconverter_common import float16
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+if len(sys.argv) != 2:
+    print("Usage: python convert_model.py <model.h5>")
+    sys.exit(1)
+
+output_directory = os.path.dirname(os.path.abspath(__file__))
+onnx_path = os.path.join(output_directory, 'emotion.onnx')
+fp16_path = os.path.join(output_directory, 'emotion_fp16.onnx')
+int8_path = os.path.join(output_directory, 'emotion_int8.onnx')
+
+classifier = load_model(sys.argv[1])
+
+# Name the input so the inference code can feed it as {'input': batch}
+input_signature = [tf.TensorSpec((None, 48, 48, 1), tf.float32, name='input')]
+tf2onnx.convert.from_keras(classifier, input_signature=input_signature, inputs_as_nchw=['input'],
+                           output_path=onnx_path)
+print(f"ONNX model saved to {onnx_path}")
+
+# FP16 weights and input halve memory traffic on GPUs; the backend's MODEL_PATH can point here
+onnx.save(float16.convert_float_to_float16(onnx.load(onnx_path)), fp16_path)
+print(f"FP16 model saved to {fp16_path}")
+
+quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8)
+print(f"INT8 model saved to {int8_path}")
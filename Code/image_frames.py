@@ -2,58 +2,105 @@ import cv2
 import os
 import sys
 
-if len(sys.argv) != 2:
-    print("Usage: python image_frames.py <video_path>")
-    sys.exit(1)
+# libjpeg-turbo's SIMD encoder is faster than cv2.imwrite; optional
+try:
+    from turbojpeg import TurboJPEG
+    tj = TurboJPEG()
+except Exception:
+    tj = None
 
-# Get the video path from the command-line argument
-video_path = sys.argv[1]
+# Preview windows are opt-in; batch runs skip the GUI work entirely
+show_frames = bool(os.environ.get("SHOW_FRAMES"))
 
 # Frame rate for sampling (e.g., 1 frame per second)
 frame_rate = 3  # Adjust this value as needed
 
+# JPEG encoder parameters, built once rather than per frame
+enc_params = [int(cv2.IMWRITE_JPEG_QUALITY), 85]
+
 # Directory to save the frames as images
 output_directory = '/Users/rishirajdatta7/Desktop/frames'  # Replace with your desired directory name
 
-# Create the output directory if it doesn't exist
-os.makedirs(output_directory, exist_ok=True)
-
-# Create a VideoCapture object to open the video file
-cap = cv2.VideoCapture(video_path)
-
-# Check if the video file is opened successfully
-if not cap.isOpened():
-    print("Error: Could not open video file.")
-    exit(1)
-
-frame_number = 0
-
-while True:
-    # Read a frame from the video
-    ret, frame = cap.read()
-
-    # Check if the frame was read successfully
-    if not ret:
-        break
-
-    # Sample frames based on frame rate
-    if frame_number % int(cap.get(cv2.CAP_PROP_FPS) / frame_rate) == 0:
-        # Define the file path to save the frame as an image
-        output_filename = os.path.join(output_directory, f'frame_{frame_number}.jpg')
-
-        # Save the frame as an image
-        cv2.imwrite(output_filename, frame)
-
-        # Display the frame (optional)
-        cv2.imshow('Video Frame', frame)
-
-    frame_number += 1
-
-    # Break the loop if the 'q' key is pressed
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-# Release the video capture object and close any open windows
-cap.release()
-cv2.destroyAllWindows()
 
+def sample_frames(video_path, out_dir=output_directory):
+    """Save every stride-th frame of the video as a JPEG in out_dir"""
+    # Create the output directory if it doesn't exist
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Create a VideoCapture object to open the video file
+    cap = cv2.VideoCapture(video_path)
+
+    # Check if the video file is opened successfully
+    if not cap.isOpened():
+        raise ValueError("Could not open video file.")
+
+    # Keep every stride-th frame; the FPS property is read once, not per frame
+    stride = max(1, int(cap.get(cv2.CAP_PROP_FPS) / frame_rate))
+
+    frame_number = 0
+    saved = 0
+
+    while True:
+        # Grab the next frame without decoding it
+        if not cap.grab():
+            break
+
+        # Sample frames based on frame rate, decoding only the ones we keep
+        if frame_number % stride == 0:
+            ret, frame = cap.retrieve()
+
+            if ret:
+                # Define the file path to save the frame as an image
+                output_filename = os.path.join(out_dir, f'frame_{frame_number}.jpg')
+
+                # Save the frame as an image
+                if tj is not None:
+                    buf = tj.encode(frame, quality=85)
+                else:
+                    ok, buf = cv2.imencode('.jpg', frame, enc_params)
+                    if not ok:
+                        buf = None
+
+                # Write the encoded bytes straight to a raw file descriptor
+                if buf is not None:
+                    fd = os.open(output_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                    try:
+                        # os.write may write fewer bytes than asked, so loop until done
+                        view = memoryview(buf).cast('B')
+                        while view:
+                            view = view[os.write(fd, view):]
+                    finally:
+                        os.close(fd)
+                    saved += 1
+
+                # Display the frame (optional)
+                if show_frames:
+                    cv2.imshow('Video Frame', frame)
+
+                    # Break the loop if the 'q' key is pressed
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
+
+        frame_number += 1
+
+    # Release the video capture object and close any open windows
+    cap.release()
+    if show_frames:
+        cv2.destroyAllWindows()
+
+    return saved
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Usage: python image_frames.py <video_path>")
+        sys.exit(1)
+
+    # Get the video path from the command-line argument
+    video_path = sys.argv[1]
+
+    try:
+        sample_frames(video_path)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
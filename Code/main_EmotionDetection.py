@@ -1,19 +1,273 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
 from keras.models import load_model
+import tensorflow as tf
+import sys
 from time import sleep
-from keras.preprocessing.image import img_to_array
 from keras.preprocessing import image
 import cv2
 import os
 import numpy as np
 
+# Pico scans integer pixel-comparison features without building an image
+# pyramid, several times faster than Haar; fall back to Haar without it
+try:
+    import pico
+    pico.load_cascade("facefinder")
+except Exception:
+    pico = None
+
+# ONNX Runtime runs the INT8-quantized export of the CNN (see convert_model.py)
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+
+# libjpeg-turbo decodes the sampled frame JPEGs faster than cv2.imread; optional
+try:
+    from turbojpeg import TurboJPEG
+    tj = TurboJPEG()
+except Exception:
+    tj = None
+
+# OpenCV's transparent API runs resize/cvtColor/Haar on an OpenCL device for
+# cv2.UMat inputs; pico needs host arrays so it only applies to the Haar path
+use_opencl = pico is None and cv2.ocl.haveOpenCL()
+cv2.ocl.setUseOpenCL(use_opencl)
+
 
 cv2_base_dir = os.path.dirname(os.path.abspath(cv2.__file__))
 path = os.path.join(cv2_base_dir, 'data/haarcascade_frontalface_default.xml')
-face_classifier = cv2.CascadeClassifier(path)
-classifier =load_model(r'/Users/rishirajdatta7/Desktop/Hackathon_techolution/Emotion_Detection_CNN/model.h5')
+model_path = r'/Users/rishirajdatta7/Desktop/Hackathon_techolution/Emotion_Detection_CNN/model.h5'
+onnx_model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'emotion_int8.onnx')
 
 emotion_labels = ['Angry','Disgust','Fear','Happy','Neutral', 'Sad', 'Surprise']
 
+# Positions in emotion_labels of each sentiment group
+POSITIVE_IDX = [3, 6]  # Happy, Surprise
+NEGATIVE_IDX = [0, 1, 2, 5]  # Angry, Disgust, Fear, Sad
+NEUTRAL_IDX = [4]  # Neutral
+
+# File suffixes treated as frame images
+image_extensions = ('.jpg', '.jpeg', '.png')
+
+# Directory image_frames.py writes sampled frames to
+image_directory = '/Users/rishirajdatta7/Desktop/frames'  # Replace with the directory containing your images
+
+# Haar scan parameters, fixed once: 1.2 pyramid steps from a 40x40 window is
+# the usual real-time operating point, and CASCADE_SCALE_IMAGE scales the
+# image rather than the cascade features
+haar_params = dict(scaleFactor=1.2, minNeighbors=3, minSize=(40, 40), flags=cv2.CASCADE_SCALE_IMAGE)
+
+# Set per process: the cascade by _init_worker in every pool worker, the CNN
+# once by load_classifier in the process running the batched inference
+face_classifier = None
+classifier = None
+session = None
+
+
+@tf.function(input_signature=[tf.TensorSpec((None, 48, 48, 1), tf.float32)])
+def infer(x):
+    # Traced once into a concrete graph; the None batch dim avoids retracing
+    return classifier(x, training=False)
+
+
+def load_classifier():
+    """Load the emotion CNN once per process, preferring the INT8 ONNX export"""
+    global classifier, session
+    if session is None and classifier is None:
+        if ort is not None and os.path.exists(onnx_model_path):
+            session = ort.InferenceSession(onnx_model_path, providers=['CPUExecutionProvider'])
+        else:
+            classifier = load_model(model_path)
+    return session or classifier
+
+
+def _init_worker(cascade_path):
+    # CascadeClassifier objects aren't picklable, so each worker builds its own
+    global face_classifier
+    face_classifier = cv2.CascadeClassifier(cascade_path)
+
+
+# Face-detection worker processes, started on the first analyze() and reused by
+# every later call so requests don't pay for process startup and cascade loading.
+# Workers are spawned, not forked: by then this process has live TensorFlow and
+# OpenCL threads, and forking those can deadlock or crash the children
+_detection_pool = None
+_detection_pool_lock = threading.Lock()
+
+
+def get_detection_pool():
+    """Return the shared face-detection process pool, creating it on first use"""
+    global _detection_pool
+    with _detection_pool_lock:
+        if _detection_pool is None:
+            _detection_pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'),
+                                                  initializer=_init_worker, initargs=(path,))
+        return _detection_pool
+
+
+def detect_faces(gray):
+    """Return (x, y, w, h) face boxes, using pico when it is available"""
+    if pico is None:
+        return face_classifier.detectMultiScale(gray, **haar_params)
+
+    detections = pico.find_objects(gray, minsize=40, maxsize=1000, scalefactor=1.2,
+                                   stridefactor=0.1, qthreshold=5.0)
+    # pico reports (row, col, size, score) centred on the face
+    return [(max(0, int(c - s / 2)), max(0, int(r - s / 2)), int(s), int(s))
+            for r, c, s, q in detections]
+
+
+def _detect_scaled(frame, scale):
+    # Detection cost scales with pixel count, so shrink the frame first and
+    # only convert that small copy to grayscale
+    small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return detect_faces(gray)
+
+
+def extract_rois(frame):
+    """Detect faces in a BGR frame and return its 48x48 grayscale ROIs"""
+    result = {'rois': [], 'positions': []}
+
+    # Detect faces in the image on a copy with a 320px longest side
+    scale = min(1.0, 320.0 / max(frame.shape[:2]))
+    faces = None
+    if use_opencl:
+        try:
+            faces = _detect_scaled(cv2.UMat(frame), scale)
+        except cv2.error:
+            faces = None
+    if faces is None:
+        faces = _detect_scaled(frame, scale)
+
+    for face in faces:
+        # Map the box back onto the full-resolution frame so the 48x48 crop keeps
+        # its detail; only the face pixels are converted at full resolution
+        x, y, w, h = (int(v / scale) for v in face)
+        roi_gray = cv2.cvtColor(frame[y:y + h, x:x + w], cv2.COLOR_BGR2GRAY)
+        roi_gray = cv2.resize(roi_gray, (48, 48), interpolation=cv2.INTER_AREA)
+
+        if np.sum([roi_gray]) != 0:
+            result['rois'].append(roi_gray)
+            result['positions'].append((x, y))
+
+    return result
+
+
+def process_frame(image_path):
+    """Detect faces in one image file and return its 48x48 grayscale ROIs"""
+    # Read the image
+    frame = None
+    if tj is not None:
+        try:
+            with open(image_path, 'rb') as f:
+                frame = tj.decode(f.read())
+        except Exception:
+            frame = None
+    if frame is None:
+        frame = cv2.imread(image_path)
+    if frame is None:
+        return {'rois': [], 'positions': []}
+
+    return extract_rois(frame)
+
+
+def predict_emotions(rois):
+    """Classify 48x48 grayscale ROIs with a single batched forward pass
+
+    Returns the index into emotion_labels of each ROI's predicted emotion.
+    """
+    if not rois:
+        return np.empty(0, dtype=np.intp)
+
+    # ROIs stay uint8 until here; the float32 conversion and the 1/255 scaling
+    # happen in a single pass straight into the preallocated batch
+    batch = np.empty((len(rois), 48, 48, 1), dtype=np.float32)
+    np.multiply(np.stack(rois), np.float32(1 / 255.0), out=batch[:, :, :, 0], dtype=np.float32)
+
+    load_classifier()
+    if session is not None:
+        # The ONNX export is channels-first; with one channel that is only a reshape
+        preds = session.run(None, {'input': batch.reshape(-1, 1, 48, 48)})[0]
+    else:
+        preds = infer(batch).numpy()
+    return preds.argmax(axis=1)
+
+
+def summarize(idx):
+    """Aggregate predicted label indices into emotion and sentiment counts"""
+    idx = np.asarray(idx, dtype=np.intp)
+    counts = np.bincount(idx, minlength=len(emotion_labels))
+
+    # Sentiment totals come from the 7-bin histogram, not another pass over faces
+    count_positive = int(counts[POSITIVE_IDX].sum())
+    count_negative = int(counts[NEGATIVE_IDX].sum())
+    count_neutral = int(counts[NEUTRAL_IDX].sum())
+
+    # Build the emotion count dictionary once from the histogram
+    emotion_count = dict(zip(emotion_labels, counts.tolist()))
+
+    return {
+        'emotion_count': emotion_count,
+        'positive': count_positive,
+        'negative': count_negative,
+        'neutral': count_neutral,
+        'final_count': count_positive+count_neutral*(-1*0.5)-count_negative
+    }
+
+
+def analyze(frames_dir=image_directory):
+    """Score every sampled frame image in frames_dir"""
+    load_classifier()
+
+    # scandir yields the entry type with the name, so no extra stat per file
+    with os.scandir(frames_dir) as it:
+        image_paths = [
+            entry.path for entry in it
+            if entry.is_file(follow_symlinks=False) and entry.name.lower().endswith(image_extensions)
+        ]
+
+    # Pass 1: face detection is independent per image, so fan it out across cores
+    frame_results = list(get_detection_pool().map(process_frame, image_paths, chunksize=16))
+
+    # Pass 2: a single forward pass over every face found
+    return summarize(predict_emotions([roi for result in frame_results for roi in result['rois']]))
+
+
+def analyze_video(video_path, frame_rate=3):
+    """Sample frames from a video and classify the faces in them
+
+    Decoded frames go straight from VideoCapture into face detection, so
+    nothing is JPEG-encoded to disk and read back as with image_frames.py.
+    """
+    if face_classifier is None:
+        _init_worker(path)
+    load_classifier()
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video file: {video_path}")
+
+    stride = max(1, int(cap.get(cv2.CAP_PROP_FPS) / frame_rate))
+    rois = []
+    frame_number = 0
+    try:
+        while cap.grab():
+            if frame_number % stride == 0:
+                ret, frame = cap.retrieve()
+                if ret:
+                    rois.extend(extract_rois(frame)['rois'])
+            frame_number += 1
+    finally:
+        cap.release()
+
+    return summarize(predict_emotions(rois))
+
+
 # cap = cv2.VideoCapture(0)
 
 
@@ -80,89 +334,26 @@ emotion_labels = ['Angry','Disgust','Fear','Happy','Neutral', 'Sad', 'Surprise']
 # cv2.waitKey(0)
 # cv2.destroyAllWindows()
 
-import cv2
-import os
-import numpy as np
-from keras.models import load_model
-from keras.preprocessing.image import img_to_array
-
-
-# Directory containing images
-image_directory = '/Users/rishirajdatta7/Desktop/frames'  # Replace with the directory containing your images
-
-# Initialize a dictionary to count emotions
-emotion_count = {label: 0 for label in emotion_labels}
-count = 0
-count_positive = 0
-count_negative = 0
-count_neutral = 0
-# Iterate through all images in the directory
-for filename in os.listdir(image_directory):
-    if filename.endswith(('.jpg', '.jpeg', '.png')):  # Check for image file extensions
-        # Construct the full file path
-        count+=1
-        image_path = os.path.join(image_directory, filename)
-
-        # Read the image
-        frame = cv2.imread(image_path)
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        # Sample and score the video in one pass, without the frames directory
+        result = analyze_video(sys.argv[1])
+    else:
+        result = analyze(image_directory)
+    emotion_count = result['emotion_count']
+
+    # Print the emotion count dictionary
+    print("Emotion Count:")
+    for label, count in emotion_count.items():
+        print(f"{label}: {count}")
+    final_count = result['final_count']
+    # print("Metric :" , (final_count/count))
+    file_path = "/Users/rishirajdatta7/Desktop/emotion_dictionary.txt"
+
+    # Write the emotion dictionary to the text file
+    with open(file_path, "w") as file:
+        for emotion, freq in emotion_count.items():
+            file.write(f"{emotion}: {freq}\n")
+
+    print(f"Emotion dictionary saved to {file_path}")
 
-        # Convert the image to grayscale
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-        # Detect faces in the image
-        faces = face_classifier.detectMultiScale(gray)
-
-        for (x, y, w, h) in faces:
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 255), 2)
-            roi_gray = gray[y:y + h, x:x + w]
-            roi_gray = cv2.resize(roi_gray, (48, 48), interpolation=cv2.INTER_AREA)
-
-            if np.sum([roi_gray]) != 0:
-                roi = roi_gray.astype('float') / 255.0
-                roi = img_to_array(roi)
-                roi = np.expand_dims(roi, axis=0)
-
-                prediction = classifier.predict(roi)[0]
-                label = emotion_labels[prediction.argmax()]
-                if(label == 'Happy' or label == 'Surprise'):
-                    count_positive += 1
-                elif(label == 'Disgust' or label == 'Angry' or label == 'Fear' or label == 'Sad'):
-                    count_negative += 1
-                elif(label == 'Neutral'):
-                    count_neutral += 1
-                label_position = (x, y)
-                cv2.putText(frame, label, label_position, cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-
-                # Increment the emotion count in the dictionary
-                emotion_count[label] += 1
-            else:
-                cv2.putText(frame, 'No Faces', (30, 80), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-
-        # Display the image with detected faces and emotion labels
-        cv2.imshow('Emotion Detector', frame)
-        #cv2.waitKey(0)
-
-# Print the emotion count dictionary
-print("Emotion Count:")
-for label, count in emotion_count.items():
-    print(f"{label}: {count}")
-# for label,count in emotion_count.items():
-#     if(label == 'Happy' or label == 'Surprise'):
-#         count_positive += 1
-#     elif(label == 'Disgust' or label == 'Angry' or label == 'Fear' or label == 'Sad'):
-#         count_negative += 1
-#     elif(label == 'Neutral'):
-#         count_neutral += 1
-# count = count_positive + count_negative + count_neutral
-final_count = count_positive+count_neutral*(-1*0.5)-count_negative 
-# print("Metric :" , (final_count/count))
-file_path = "/Users/rishirajdatta7/Desktop/emotion_dictionary.txt"
-
-# Write the emotion dictionary to the text file
-with open(file_path, "w") as file:
-    for emotion, freq in emotion_count.items():
-        file.write(f"{emotion}: {freq}\n")
-
-print(f"Emotion dictionary saved to {file_path}")
-
-cv2.destroyAllWindows()
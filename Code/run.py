@@ -1,17 +1,25 @@
-import subprocess
 import sys
 
-if len(sys.argv) != 2:
-    print("Usage: python run.py <video_path>")
-    sys.exit(1)
+import image_frames
+import main_EmotionDetection
 
-# Get the video path from the command-line argument
-video_path = sys.argv[1]
+# Guarded so the process pool in main_EmotionDetection.analyze can re-import
+# this module in its workers without re-running the pipeline
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Usage: python run.py <video_path>")
+        sys.exit(1)
 
-# Run image_frames.py with the video path as an argument
-print("Running image_frames.py...")
-subprocess.run(["python", "image_frames.py", video_path])
+    # Get the video path from the command-line argument
+    video_path = sys.argv[1]
 
-# Run main.py
-print("Running main.py...")
-subprocess.run(["python", "main.py"])
+    # Sample the video's frames in this process
+    print("Sampling video frames...")
+    image_frames.sample_frames(video_path, main_EmotionDetection.image_directory)
+
+    # Score the sampled frames in this process instead of spawning a fresh interpreter
+    print("Running emotion analysis...")
+    result = main_EmotionDetection.analyze(main_EmotionDetection.image_directory)
+    print("Emotion Count:")
+    for label, count in result['emotion_count'].items():
+        print(f"{label}: {count}")
@@ -16,6 +16,8 @@ from fastapi import FastAPI, File, UploadFile, Form, HTTPException, BackgroundTa
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
+import aiofiles
+from cachetools import TTLCache
 
 from processors.video_processor import VideoProcessor
 from processors.audio_processor import AudioProcessor
@@ -52,9 +54,12 @@ scoring_engine = None
 root_dir = Path(__file__).resolve().parents[1]
 model_path = os.getenv("MODEL_PATH") or os.path.join(root_dir, "Code", "model.h5")
 cascade_path = os.getenv("CASCADE_PATH") or os.path.join(root_dir, "Code", "haarcascade_frontalface_default.xml")
+engine_path = os.getenv("TRT_ENGINE_PATH") or os.path.join(root_dir, "Code", "emotion.trt")
+face_detector_path = os.getenv("FACE_DETECTOR_PATH") or os.path.join(root_dir, "Code", "face_detection_yunet_2023mar.onnx")
 
 try:
-    video_processor = VideoProcessor(model_path=model_path, cascade_path=cascade_path)
+    video_processor = VideoProcessor(model_path=model_path, cascade_path=cascade_path, engine_path=engine_path,
+                                     face_detector_path=face_detector_path)
     logger.info("Video processor initialized")
 except Exception as e:
     logger.warning(f"Video processor unavailable: {e}")
@@ -77,9 +82,25 @@ try:
 except Exception as e:
     logger.warning(f"Scoring engine unavailable: {e}")
 
+# Uploads are copied to disk in 1MB chunks instead of being read into memory whole
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+async def save_upload(upload: UploadFile, path: str):
+    """Stream an uploaded file to disk without buffering it in memory"""
+    async with aiofiles.open(path, "wb") as f:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            await f.write(chunk)
+
 # In-memory storage for processing results (use Redis/DB in production)
-processing_results = {}
-processing_status = {}
+# Entries expire after RESULTS_TTL_SECONDS and the stores are size-bounded, so
+# memory and /active-processes latency don't grow with every upload ever made
+RESULTS_TTL_SECONDS = int(os.getenv("RESULTS_TTL_SECONDS", "3600"))
+RESULTS_MAX_ENTRIES = int(os.getenv("RESULTS_MAX_ENTRIES", "1024"))
+processing_results = TTLCache(maxsize=RESULTS_MAX_ENTRIES, ttl=RESULTS_TTL_SECONDS)
+processing_status = TTLCache(maxsize=RESULTS_MAX_ENTRIES, ttl=RESULTS_TTL_SECONDS)
 
 class ProcessingStatus:
     PENDING = "pending"
@@ -87,6 +108,13 @@ class ProcessingStatus:
     COMPLETED = "completed"
     ERROR = "error"
 
+def update_status(process_id: str, **fields):
+    """Update a job's status, re-inserting it if the store evicted it mid-run"""
+    # Re-assigning also restarts the entry's TTL, so a running job stays visible
+    status = processing_status.get(process_id, {"status": ProcessingStatus.PROCESSING})
+    status.update(fields)
+    processing_status[process_id] = status
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -143,13 +171,8 @@ async def upload_files(
         video_path = os.path.join(temp_dir, f"video_{video.filename}")
         resume_path = os.path.join(temp_dir, f"resume_{resume.filename}")
         
-        with open(video_path, "wb") as f:
-            content = await video.read()
-            f.write(content)
-        
-        with open(resume_path, "wb") as f:
-            content = await resume.read()
-            f.write(content)
+        await save_upload(video, video_path)
+        await save_upload(resume, resume_path)
         
         # Initialize processing status
         processing_status[process_id] = {
@@ -192,29 +215,32 @@ async def process_candidate(
     
     try:
         # Update status
-        processing_status[process_id].update({
-            "status": ProcessingStatus.PROCESSING,
-            "progress": 10,
-            "message": "Starting video analysis..."
-        })
+        update_status(
+            process_id,
+            status=ProcessingStatus.PROCESSING,
+            progress=10,
+            message="Starting video analysis..."
+        )
         
         # Process video
         logger.info(f"Processing video for {process_id}")
         video_results = video_processor.process_video(video_path)
         
-        processing_status[process_id].update({
-            "progress": 40,
-            "message": "Video analysis complete. Starting audio analysis..."
-        })
+        update_status(
+            process_id,
+            progress=40,
+            message="Video analysis complete. Starting audio analysis..."
+        )
         
         # Process audio
         logger.info(f"Processing audio for {process_id}")
         audio_results = audio_processor.process_audio(video_path)
         
-        processing_status[process_id].update({
-            "progress": 70,
-            "message": "Audio analysis complete. Starting text analysis..."
-        })
+        update_status(
+            process_id,
+            progress=70,
+            message="Audio analysis complete. Starting text analysis..."
+        )
         
         # Process text
         logger.info(f"Processing text for {process_id}")
@@ -223,10 +249,11 @@ async def process_candidate(
             resume_path, job_description, transcript, leetcode_username
         )
         
-        processing_status[process_id].update({
-            "progress": 90,
-            "message": "Text analysis complete. Calculating scores..."
-        })
+        update_status(
+            process_id,
+            progress=90,
+            message="Text analysis complete. Calculating scores..."
+        )
         
         # Calculate scores
         logger.info(f"Calculating scores for {process_id}")
@@ -258,22 +285,24 @@ async def process_candidate(
         }
         
         # Update final status
-        processing_status[process_id].update({
-            "status": ProcessingStatus.COMPLETED,
-            "progress": 100,
-            "message": "Processing completed successfully",
-            "completed_at": datetime.now().isoformat()
-        })
+        update_status(
+            process_id,
+            status=ProcessingStatus.COMPLETED,
+            progress=100,
+            message="Processing completed successfully",
+            completed_at=datetime.now().isoformat()
+        )
         
         logger.info(f"Processing completed for {process_id}")
         
     except Exception as e:
         logger.error(f"Error processing candidate {process_id}: {str(e)}")
-        processing_status[process_id].update({
-            "status": ProcessingStatus.ERROR,
-            "message": f"Processing failed: {str(e)}",
-            "error_at": datetime.now().isoformat()
-        })
+        update_status(
+            process_id,
+            status=ProcessingStatus.ERROR,
+            message=f"Processing failed: {str(e)}",
+            error_at=datetime.now().isoformat()
+        )
     
     finally:
         # Clean up temporary files
@@ -287,30 +316,44 @@ async def process_candidate(
 async def get_processing_status(process_id: str):
     """Get processing status for a specific process ID"""
     
-    if process_id not in processing_status:
+    status = _lookup_status(process_id)
+    if status is None:
         raise HTTPException(status_code=404, detail="Process ID not found")
     
-    return processing_status[process_id]
+    return status
 
 @app.get("/results/{process_id}")
 async def get_results(process_id: str):
     """Get processing results for a specific process ID"""
     
-    if process_id not in processing_status:
+    status = _lookup_status(process_id)
+    if status is None:
         raise HTTPException(status_code=404, detail="Process ID not found")
     
-    status = processing_status[process_id]
-    
     if status["status"] == ProcessingStatus.PROCESSING:
         raise HTTPException(status_code=202, detail="Processing still in progress")
     
     if status["status"] == ProcessingStatus.ERROR:
         raise HTTPException(status_code=500, detail=status.get("message", "Processing failed"))
     
-    if process_id not in processing_results:
+    results = processing_results.get(process_id)
+    if results is None:
         raise HTTPException(status_code=404, detail="Results not found")
     
-    return processing_results[process_id]
+    return results
+
+def _lookup_status(process_id: str) -> Optional[Dict]:
+    """Get a job's status, treating a completed job whose results expired as gone"""
+    # Status and results are evicted independently; drop whichever half is left
+    # so a job is never reported "completed" without fetchable results
+    status = processing_status.get(process_id)
+    if status is None:
+        processing_results.pop(process_id, None)
+        return None
+    if status["status"] == ProcessingStatus.COMPLETED and process_id not in processing_results:
+        processing_status.pop(process_id, None)
+        return None
+    return status
 
 @app.delete("/results/{process_id}")
 async def delete_results(process_id: str):
@@ -318,12 +361,10 @@ async def delete_results(process_id: str):
     
     deleted_items = []
     
-    if process_id in processing_status:
-        del processing_status[process_id]
+    if processing_status.pop(process_id, None) is not None:
         deleted_items.append("status")
     
-    if process_id in processing_results:
-        del processing_results[process_id]
+    if processing_results.pop(process_id, None) is not None:
         deleted_items.append("results")
     
     if not deleted_items:
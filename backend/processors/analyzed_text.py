@@ -0,0 +1,22 @@
+"""
+Analyzed Text
+Normalized views of a text computed once and shared by the text analyzers
+"""
+
+from dataclasses import dataclass
+from typing import List, Union
+
+
+@dataclass(frozen=True)
+class AnalyzedText:
+    raw: str
+    lower: str
+    tokens: List[str]
+
+    @classmethod
+    def of(cls, text: Union[str, 'AnalyzedText']) -> 'AnalyzedText':
+        """Build the lowercased text and its whitespace tokens, or pass through an existing one"""
+        if isinstance(text, AnalyzedText):
+            return text
+        lower = text.lower()
+        return cls(raw=text, lower=lower, tokens=lower.split())
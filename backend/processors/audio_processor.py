@@ -5,16 +5,57 @@ Handles audio transcription, silence analysis, emotion analysis, and filler word
 
 import os
 import tempfile
-import librosa
+import av
 import numpy as np
-from typing import Dict, List, Tuple
+import soundfile as sf
+from typing import Dict, List, NamedTuple, Tuple, Union
 import re
-from textblob import TextBlob
+from collections import Counter
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from processors.analyzed_text import AnalyzedText
 
 logger = logging.getLogger(__name__)
 
+# faster-whisper decodes 30s audio chunks as a batch; optional
+try:
+    from faster_whisper import BatchedInferencePipeline, WhisperModel  # type: ignore
+except ImportError:
+    WhisperModel = None
+
+# RE2 matches in linear time, which helps on long transcripts; stdlib re otherwise
+try:
+    import re2 as regex_engine  # type: ignore
+except ImportError:
+    regex_engine = re
+
+def find_silent_runs(energy: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Return start and end (exclusive) frame indices of each run of frames below threshold"""
+    # Rising/falling edges of the zero-padded silent-frame mask mark run boundaries
+    silent_frames = (energy < threshold).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], silent_frames, [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+class SilentSegments(NamedTuple):
+    """Silent segments as parallel arrays of start, end and duration in seconds"""
+    starts: np.ndarray
+    ends: np.ndarray
+    durations: np.ndarray
+    
+    def longer_than(self, seconds: float) -> 'SilentSegments':
+        """Segments lasting at least the given number of seconds"""
+        keep = self.durations >= seconds
+        return SilentSegments(self.starts[keep], self.ends[keep], self.durations[keep])
+    
+    def as_dicts(self) -> List[Dict]:
+        """Materialize as a list of {'start', 'end', 'duration'} dicts for the JSON response"""
+        return [
+            {'start': float(start), 'end': float(end), 'duration': float(duration)}
+            for start, end, duration in zip(self.starts, self.ends, self.durations)
+        ]
+
 class AudioProcessor:
     def __init__(self):
         """Initialize audio processor with sentiment analyzer and filler words"""
@@ -27,8 +68,46 @@ class AudioProcessor:
             'kind of', 'sort of', 'i mean', 'you see', 'right'
         ]
         
+        # One alternation over all fillers, compiled once; longer phrases first so
+        # they win over any filler they start with
+        filler_alternation = '|'.join(
+            re.escape(filler) for filler in sorted(self.filler_words, key=len, reverse=True)
+        )
+        self.filler_pattern = regex_engine.compile(r'\b(' + filler_alternation + r')\b')
+        
         # Silence threshold in seconds
         self.silence_threshold = 3.0
+        
+        # Analysis sample rate: Whisper's native rate
+        self.sample_rate = 16000
+        
+        # Energy analysis window and hop, in samples
+        self.frame_length = 2048
+        self.hop_length = 512
+        
+        # Whisper model settings; the model itself is loaded on first use
+        self.whisper_model_size = os.getenv("WHISPER_MODEL", "base")
+        self.whisper_device = os.getenv("WHISPER_DEVICE", "cuda")
+        self.whisper_batch_size = int(os.getenv("WHISPER_BATCH_SIZE", "16"))
+        self._whisper_pipeline = None
+        self._whisper_load_failed = False
+    
+    def decode_audio(self, video_path: str) -> Tuple[np.ndarray, int]:
+        """Decode the audio track of a video to mono float32 samples at sample_rate"""
+        chunks = []
+        with av.open(video_path) as container:
+            stream = container.streams.audio[0]
+            resampler = av.AudioResampler(format='flt', layout='mono', rate=self.sample_rate)
+            for frame in container.decode(stream):
+                for resampled in resampler.resample(frame):
+                    chunks.append(resampled.to_ndarray().reshape(-1))
+            
+            # Flush samples still buffered in the resampler
+            for resampled in resampler.resample(None):
+                chunks.append(resampled.to_ndarray().reshape(-1))
+        
+        y = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.float32)
+        return y, self.sample_rate
     
     def extract_audio_from_video(self, video_path: str) -> str:
         """Extract audio from video file"""
@@ -37,9 +116,9 @@ class AudioProcessor:
             temp_audio_path = temp_audio.name
             temp_audio.close()
             
-            # Use librosa to load video and extract audio
-            y, sr = librosa.load(video_path, sr=None)
-            librosa.output.write_wav(temp_audio_path, y, sr)
+            # Decode the audio track with PyAV and write it out as 16kHz mono WAV
+            y, sr = self.decode_audio(video_path)
+            sf.write(temp_audio_path, y, sr)
             
             return temp_audio_path
             
@@ -47,15 +126,42 @@ class AudioProcessor:
             logger.error(f"Error extracting audio: {str(e)}")
             raise
     
-    def transcribe_audio(self, audio_path: str) -> str:
+    def _get_whisper_pipeline(self):
+        """Load the batched faster-whisper pipeline once, or None if unavailable"""
+        if self._whisper_pipeline is None and WhisperModel is not None and not self._whisper_load_failed:
+            # Fall back to CPU once if the configured device can't load the model
+            devices = [self.whisper_device] + (["cpu"] if self.whisper_device != "cpu" else [])
+            for device in devices:
+                try:
+                    # INT8 weights with FP16 activations on GPU, plain INT8 on CPU
+                    compute_type = "int8_float16" if device == "cuda" else "int8"
+                    model = WhisperModel(self.whisper_model_size, device=device,
+                                         compute_type=compute_type)
+                    self._whisper_pipeline = BatchedInferencePipeline(model=model)
+                    break
+                except Exception as e:
+                    logger.warning(f"Whisper model unavailable on {device}: {e}")
+            else:
+                # Don't retry the load on every request
+                logger.warning("Whisper model unavailable, using placeholder transcript")
+                self._whisper_load_failed = True
+        return self._whisper_pipeline
+    
+    def transcribe_audio(self, audio: Union[str, np.ndarray]) -> str:
         """
         Transcribe audio to text using Whisper
-        Note: This is a placeholder - in production, you'd use OpenAI Whisper API
-        or run Whisper locally
+        Accepts a file path or mono float32 samples at 16kHz, Whisper's native rate
+        Uses faster-whisper's batched pipeline, which splits the audio into chunks of
+        up to 30s and decodes them as one batch; falls back to a sample transcript
+        when faster-whisper is not installed
         """
         try:
-            # Placeholder transcription - replace with actual Whisper implementation
-            # For now, return a sample transcript for testing
+            pipeline = self._get_whisper_pipeline()
+            if pipeline is not None:
+                segments, _ = pipeline.transcribe(audio, batch_size=self.whisper_batch_size)
+                return " ".join(segment.text.strip() for segment in segments)
+            
+            # Placeholder transcription for environments without Whisper
             sample_transcript = """
             Hello, my name is John Doe and I am applying for the software engineer position.
             I have five years of experience in Python development and machine learning.
@@ -66,96 +172,104 @@ class AudioProcessor:
             and my ability to work well in a team environment.
             """
             
-            # TODO: Implement actual Whisper transcription
-            # import whisper
-            # model = whisper.load_model("base")
-            # result = model.transcribe(audio_path)
-            # return result["text"]
-            
             return sample_transcript.strip()
             
         except Exception as e:
             logger.error(f"Error transcribing audio: {str(e)}")
             return ""
     
-    def analyze_silence(self, audio_path: str) -> Dict:
-        """Analyze silence patterns in audio"""
+    def _frame_energy(self, y: np.ndarray) -> np.ndarray:
+        """Mean-square energy of each frame_length window of y, advancing by hop_length"""
+        if len(y) < self.frame_length:
+            return np.empty(0, dtype=np.float32)
+        windows = np.lib.stride_tricks.sliding_window_view(y, self.frame_length)[::self.hop_length]
+        # Row-wise dot products in one pass over the zero-copy view, no squared temporary
+        return np.einsum('ij,ij->i', windows, windows) / self.frame_length
+    
+    def _stream_energy(self, audio_path: str) -> Tuple[np.ndarray, int, float]:
+        """Compute framed energy block by block without loading the whole file"""
+        info = sf.info(audio_path)
+        frames_per_block = 1024
+        
+        # Consecutive blocks overlap by frame_length - hop_length samples and advance
+        # by a whole number of hops, so the frames tile the signal exactly
+        blocksize = self.frame_length + self.hop_length * (frames_per_block - 1)
+        energy_chunks = []
+        for block in sf.blocks(audio_path, blocksize=blocksize,
+                               overlap=self.frame_length - self.hop_length, dtype='float32'):
+            if block.ndim > 1:
+                block = block.mean(axis=1)  # Downmix to mono
+            energy_chunks.append(self._frame_energy(block))
+        
+        energy = np.concatenate(energy_chunks) if energy_chunks else np.empty(0, dtype=np.float32)
+        return energy, info.samplerate, info.frames / info.samplerate
+    
+    def _analyze_energy(self, energy: np.ndarray, sr: int, total_duration: float) -> Dict:
+        """Find silent segments and score confidence from framed mean-square energy"""
+        hop_length = self.hop_length
+        
+        # Define silence threshold (adjust based on your needs)
+        silence_threshold = 0.01
+        
+        # Find silent segments; RMS < t is energy < t**2, which skips the square root
+        starts, ends = find_silent_runs(energy, silence_threshold ** 2)
+        
+        # Convert frames to time and keep runs long enough to count as silence
+        start_times = (starts * hop_length / sr).astype(np.float32)
+        end_times = (ends * hop_length / sr).astype(np.float32)
+        segments = SilentSegments(start_times, end_times, end_times - start_times)
+        segments = segments.longer_than(self.silence_threshold)
+        
+        # Calculate silence metrics
+        total_silence_duration = float(segments.durations.sum())
+        silence_ratio = total_silence_duration / total_duration if total_duration > 0 else 0
+        
+        # Confidence score based on silence (less silence = higher confidence)
+        confidence_score = max(0, 100 - (silence_ratio * 100))
+        
+        return {
+            'silent_segments': segments.as_dicts(),
+            'total_silence_duration': total_silence_duration,
+            'total_duration': total_duration,
+            'silence_ratio': silence_ratio,
+            'confidence_score': round(confidence_score, 2)
+        }
+    
+    def analyze_silence(self, y: np.ndarray, sr: int) -> Dict:
+        """Analyze silence patterns in already-decoded mono audio"""
         try:
-            # Load audio file
-            y, sr = librosa.load(audio_path)
-            
-            # Calculate RMS energy
-            rms = librosa.feature.rms(y=y)[0]
-            
-            # Define silence threshold (adjust based on your needs)
-            silence_threshold = 0.01
-            
-            # Find silent segments
-            silent_frames = rms < silence_threshold
-            
-            # Convert frames to time
-            frame_length = len(y) / len(rms)
-            silent_segments = []
-            current_silence_start = None
-            
-            for i, is_silent in enumerate(silent_frames):
-                time = i * frame_length / sr
-                
-                if is_silent and current_silence_start is None:
-                    current_silence_start = time
-                elif not is_silent and current_silence_start is not None:
-                    silence_duration = time - current_silence_start
-                    if silence_duration >= self.silence_threshold:
-                        silent_segments.append({
-                            'start': current_silence_start,
-                            'end': time,
-                            'duration': silence_duration
-                        })
-                    current_silence_start = None
-            
-            # Calculate silence metrics
-            total_silence_duration = sum(seg['duration'] for seg in silent_segments)
-            total_duration = len(y) / sr
-            silence_ratio = total_silence_duration / total_duration if total_duration > 0 else 0
-            
-            # Confidence score based on silence (less silence = higher confidence)
-            confidence_score = max(0, 100 - (silence_ratio * 100))
-            
-            return {
-                'silent_segments': silent_segments,
-                'total_silence_duration': total_silence_duration,
-                'total_duration': total_duration,
-                'silence_ratio': silence_ratio,
-                'confidence_score': round(confidence_score, 2)
-            }
-            
+            return self._analyze_energy(self._frame_energy(y), sr, len(y) / sr)
         except Exception as e:
             logger.error(f"Error analyzing silence: {str(e)}")
             return {'confidence_score': 50.0, 'error': str(e)}
     
-    def analyze_sentiment(self, transcript: str) -> Dict:
+    def analyze_silence_from_path(self, audio_path: str) -> Dict:
+        """Analyze silence patterns in an audio file, streaming it from disk"""
+        try:
+            return self._analyze_energy(*self._stream_energy(audio_path))
+        except Exception as e:
+            logger.error(f"Error analyzing silence: {str(e)}")
+            return {'confidence_score': 50.0, 'error': str(e)}
+    
+    def analyze_sentiment(self, transcript: Union[str, AnalyzedText]) -> Dict:
         """Analyze sentiment of transcript using VADER"""
         try:
-            if not transcript.strip():
+            text = AnalyzedText.of(transcript)
+            if not text.tokens:
                 return {'sentiment_score': 50.0, 'sentiment': 'neutral'}
             
-            # VADER sentiment analysis
-            vader_scores = self.sentiment_analyzer.polarity_scores(transcript)
-            
-            # TextBlob sentiment analysis for comparison
-            blob = TextBlob(transcript)
-            textblob_polarity = blob.sentiment.polarity
+            # VADER sentiment analysis (uses capitalization, so score the raw text)
+            vader_scores = self.sentiment_analyzer.polarity_scores(text.raw)
             
-            # Combine scores (VADER is more suitable for social media text)
-            combined_score = (vader_scores['compound'] + textblob_polarity) / 2
+            compound = vader_scores['compound']
             
-            # Convert to 0-100 scale
-            sentiment_score = ((combined_score + 1) / 2) * 100
+            # Convert compound score to 0-100 scale
+            sentiment_score = ((compound + 1) / 2) * 100
             
-            # Determine sentiment category
-            if sentiment_score >= 60:
+            # Determine sentiment category using VADER's standard compound thresholds
+            if compound > 0.05:
                 sentiment = 'positive'
-            elif sentiment_score <= 40:
+            elif compound < -0.05:
                 sentiment = 'negative'
             else:
                 sentiment = 'neutral'
@@ -163,41 +277,27 @@ class AudioProcessor:
             return {
                 'sentiment_score': round(sentiment_score, 2),
                 'sentiment': sentiment,
-                'vader_scores': vader_scores,
-                'textblob_polarity': textblob_polarity
+                'vader_scores': vader_scores
             }
             
         except Exception as e:
             logger.error(f"Error analyzing sentiment: {str(e)}")
             return {'sentiment_score': 50.0, 'sentiment': 'neutral', 'error': str(e)}
     
-    def analyze_filler_words(self, transcript: str) -> Dict:
+    def analyze_filler_words(self, transcript: Union[str, AnalyzedText]) -> Dict:
         """Analyze filler words and hesitation patterns"""
         try:
-            if not transcript.strip():
-                return {'filler_score': 100.0, 'filler_count': 0}
-            
-            # Convert to lowercase for analysis
-            text_lower = transcript.lower()
-            words = text_lower.split()
-            total_words = len(words)
+            # Lowercased text and word list, shared with the other analyzers
+            text = AnalyzedText.of(transcript)
+            total_words = len(text.tokens)
             
             if total_words == 0:
                 return {'filler_score': 100.0, 'filler_count': 0}
             
-            # Count filler words
-            filler_count = 0
-            filler_details = {}
-            
-            for filler in self.filler_words:
-                if ' ' in filler:  # Multi-word fillers
-                    count = len(re.findall(r'\b' + re.escape(filler) + r'\b', text_lower))
-                else:  # Single word fillers
-                    count = text_lower.split().count(filler)
-                
-                if count > 0:
-                    filler_details[filler] = count
-                    filler_count += count
+            # Count filler words in a single scan of the transcript
+            matches = self.filler_pattern.findall(text.lower)
+            filler_count = len(matches)
+            filler_details = dict(Counter(matches))
             
             # Calculate filler ratio
             filler_ratio = filler_count / total_words
@@ -220,16 +320,21 @@ class AudioProcessor:
     def process_audio(self, video_path: str) -> Dict:
         """Process audio from video and return comprehensive analysis"""
         try:
-            # Extract audio from video
-            audio_path = self.extract_audio_from_video(video_path)
+            # Decode the audio track once at Whisper's 16kHz and share the samples between steps
+            y, sr = self.decode_audio(video_path)
             
-            # Transcribe audio
-            transcript = self.transcribe_audio(audio_path)
+            # Silence analysis only needs the samples, so run it while Whisper transcribes
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                silence_future = executor.submit(self.analyze_silence, y, sr)
+                
+                # Transcribe audio
+                transcript = self.transcribe_audio(y)
+                silence_analysis = silence_future.result()
             
-            # Perform various analyses
-            silence_analysis = self.analyze_silence(audio_path)
-            sentiment_analysis = self.analyze_sentiment(transcript)
-            filler_analysis = self.analyze_filler_words(transcript)
+            # Perform transcript analyses
+            analyzed_transcript = AnalyzedText.of(transcript)
+            sentiment_analysis = self.analyze_sentiment(analyzed_transcript)
+            filler_analysis = self.analyze_filler_words(analyzed_transcript)
             
             # Calculate overall audio confidence score (weighted average)
             silence_weight = 0.4
@@ -242,12 +347,6 @@ class AudioProcessor:
                 filler_analysis.get('filler_score', 50) * filler_weight
             )
             
-            # Clean up temporary audio file
-            try:
-                os.unlink(audio_path)
-            except:
-                pass
-            
             return {
                 'transcript': transcript,
                 'silence_analysis': silence_analysis,
@@ -3,24 +3,61 @@ Text Analysis Processor
 Handles resume analysis, job description matching, and skill assessment
 """
 
+import copy
 import os
 import re
+import threading
+from operator import attrgetter
 import numpy as np
-from typing import Dict, List, Tuple
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.metrics.pairwise import linear_kernel
 import PyPDF2
 import docx
 import requests
 import logging
+from cachetools import LRUCache, TTLCache, cachedmethod
+from cachetools.keys import hashkey
+
+from processors.analyzed_text import AnalyzedText
 
 logger = logging.getLogger(__name__)
 
+# PDFium (C++) extracts PDF text much faster than pure-Python PyPDF2; optional
+try:
+    import pypdfium2 as pdfium  # type: ignore
+except ImportError:
+    pdfium = None
+
+# Aho-Corasick finds every skill in one pass over the text; optional
+try:
+    import ahocorasick  # type: ignore
+except ImportError:
+    ahocorasick = None
+
+# Characters that make up a skill token; a match must not touch one on either side
+SKILL_CHARS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789+#')
+
+def _is_whole_word(text: str, start: int, end: int) -> bool:
+    """Whether text[start:end] is not glued to neighbouring skill characters"""
+    return ((start == 0 or text[start - 1] not in SKILL_CHARS) and
+            (end == len(text) or text[end] not in SKILL_CHARS))
+
+def _match_key(self, text, job_description, similarity=None):
+    """Cache key for a match analysis: the raw texts and any precomputed similarity"""
+    return hashkey(AnalyzedText.of(text).raw, AnalyzedText.of(job_description).raw, similarity)
+
 class TextProcessor:
     def __init__(self, leetcode_api_key: str = None):
         """Initialize text processor with optional LeetCode API key"""
         self.leetcode_api_key = leetcode_api_key
-        self.vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
+        
+        # Memoized results for repeat candidates and re-rendered reports
+        self._init_caches()
+        # Stateless hashed term vectors: no vocabulary to fit, safe to share across threads
+        self.vectorizer = HashingVectorizer(stop_words='english', n_features=2**17,
+                                            alternate_sign=False, norm='l2')
         
         # Common technical skills keywords
         self.technical_skills = [
@@ -40,16 +77,63 @@ class TextProcessor:
             'time management', 'project management', 'collaboration', 'mentoring',
             'presentation', 'negotiation', 'customer service', 'interpersonal'
         ]
+        
+        # Normalize once so extracted skills compare directly against lowercased text
+        self.technical_skills = [skill.lower() for skill in self.technical_skills]
+        self.soft_skills = [skill.lower() for skill in self.soft_skills]
+        
+        # A skill only counts as a whole word: the characters around it must not be
+        # SKILL_CHARS. Skills made of SKILL_CHARS alone are whole tokens; the rest
+        # ('machine learning', 'ci/cd', 'scikit-learn') get a bounded regex
+        self.token_pattern = re.compile(r'[a-z0-9+#]+')
+        self.multi_word_skills = {
+            skill: re.compile(r'(?<![a-z0-9+#])' + re.escape(skill) + r'(?![a-z0-9+#])')
+            for skill in self.technical_skills + self.soft_skills
+            if not self.token_pattern.fullmatch(skill)
+        }
+        
+        # Multi-pattern automaton over all skills, built once
+        self.skill_automaton = None
+        if ahocorasick is not None:
+            self.skill_automaton = ahocorasick.Automaton()
+            for category, skills in (('technical', self.technical_skills), ('soft', self.soft_skills)):
+                for skill in skills:
+                    self.skill_automaton.add_word(skill, (skill, category))
+            self.skill_automaton.make_automaton()
+    
+    def _init_caches(self):
+        """Create the memo caches and the lock guarding them"""
+        self._match_cache = LRUCache(maxsize=256)
+        self._leetcode_cache = TTLCache(maxsize=512, ttl=3600)
+        self._cache_lock = threading.Lock()
+    
+    def __getstate__(self):
+        """Drop the lock and caches so the processor can be sent to worker processes"""
+        state = self.__dict__.copy()
+        for name in ('_match_cache', '_leetcode_cache', '_cache_lock'):
+            state.pop(name, None)
+        return state
+    
+    def __setstate__(self, state):
+        """Restore attributes and give the copy its own empty caches"""
+        self.__dict__.update(state)
+        self._init_caches()
     
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """Extract text from PDF file"""
         try:
-            text = ""
+            if pdfium is not None:
+                pdf = pdfium.PdfDocument(pdf_path)
+                try:
+                    parts = [page.get_textpage().get_text_range() for page in pdf]
+                finally:
+                    pdf.close()
+                return "\n".join(parts).strip()
+            
             with open(pdf_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-            return text.strip()
+                parts = [page.extract_text() for page in pdf_reader.pages]
+            return "\n".join(parts).strip()
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {str(e)}")
             return ""
@@ -58,66 +142,101 @@ class TextProcessor:
         """Extract text from DOCX file"""
         try:
             doc = docx.Document(docx_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text.strip()
+            return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
         except Exception as e:
             logger.error(f"Error extracting text from DOCX: {str(e)}")
             return ""
     
+    def extract_text_from_txt(self, txt_path: str) -> str:
+        """Extract text from plain text file"""
+        with open(txt_path, 'r', encoding='utf-8') as file:
+            return file.read()
+    
+    # Text extractor for each supported file extension
+    _EXTRACTORS = {
+        '.pdf': extract_text_from_pdf,
+        '.docx': extract_text_from_docx,
+        '.txt': extract_text_from_txt,
+    }
+    
     def extract_text_from_file(self, file_path: str) -> str:
         """Extract text from various file formats"""
         try:
             file_extension = os.path.splitext(file_path)[1].lower()
             
-            if file_extension == '.pdf':
-                return self.extract_text_from_pdf(file_path)
-            elif file_extension == '.docx':
-                return self.extract_text_from_docx(file_path)
-            elif file_extension == '.txt':
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    return file.read()
-            else:
+            extractor = self._EXTRACTORS.get(file_extension)
+            if extractor is None:
                 logger.warning(f"Unsupported file format: {file_extension}")
                 return ""
+            return extractor(self, file_path)
         except Exception as e:
             logger.error(f"Error extracting text from file: {str(e)}")
             return ""
     
-    def calculate_text_similarity(self, text1: str, text2: str) -> float:
-        """Calculate cosine similarity between two texts"""
+    def extract_texts_from_files(self, file_paths: List[str]) -> List[str]:
+        """Extract text from many files in parallel, one worker process per core"""
+        with ProcessPoolExecutor() as executor:
+            return list(executor.map(self.extract_text_from_file, file_paths))
+    
+    def calculate_text_similarities(self, reference: str, texts: List[str]) -> List[float]:
+        """Calculate cosine similarity of each text to a reference text"""
+        similarities = [0.0] * len(texts)
         try:
-            if not text1.strip() or not text2.strip():
-                return 0.0
+            present = [i for i, text in enumerate(texts) if text.strip()]
+            if not reference.strip() or not present:
+                return similarities
             
-            # Vectorize texts
-            tfidf_matrix = self.vectorizer.fit_transform([text1, text2])
+            # Hash all texts in one transform call; nothing is fitted
+            term_matrix = self.vectorizer.transform([reference] + [texts[i] for i in present])
             
-            # Calculate cosine similarity
-            similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+            # Rows are L2-normalized, so the dot product is the cosine similarity
+            scores = linear_kernel(term_matrix[0:1], term_matrix[1:])[0]
+            for i, score in zip(present, scores):
+                similarities[i] = float(score)
             
-            return float(similarity)
+            return similarities
         except Exception as e:
             logger.error(f"Error calculating text similarity: {str(e)}")
-            return 0.0
+            return [0.0] * len(texts)
+    
+    def calculate_text_similarity(self, text1: str, text2: str) -> float:
+        """Calculate cosine similarity between two texts"""
+        return self.calculate_text_similarities(text1, [text2])[0]
     
-    def extract_skills(self, text: str) -> Dict:
+    def extract_skills(self, text: Union[str, AnalyzedText]) -> Dict:
         """Extract technical and soft skills from text"""
         try:
-            text_lower = text.lower()
+            text_lower = AnalyzedText.of(text).lower
+            
+            if self.skill_automaton is not None:
+                # One scan reports every skill occurring anywhere in the text
+                found = {'technical': set(), 'soft': set()}
+                for end, (skill, category) in self.skill_automaton.iter(text_lower):
+                    if _is_whole_word(text_lower, end - len(skill) + 1, end + 1):
+                        found[category].add(skill)
+                
+                # Keep the skill-list order of the loop-based path
+                found_technical = [skill for skill in self.technical_skills if skill in found['technical']]
+                found_soft = [skill for skill in self.soft_skills if skill in found['soft']]
+                
+                return {
+                    'technical_skills': found_technical,
+                    'soft_skills': found_soft,
+                    'total_skills': len(found_technical) + len(found_soft)
+                }
+            
+            # Tokenize once so single-word skills are set lookups rather than substring scans
+            tokens = set(self.token_pattern.findall(text_lower))
+            
+            def has_skill(skill):
+                pattern = self.multi_word_skills.get(skill)
+                return pattern.search(text_lower) is not None if pattern else skill in tokens
             
             # Find technical skills
-            found_technical = []
-            for skill in self.technical_skills:
-                if skill.lower() in text_lower:
-                    found_technical.append(skill)
+            found_technical = [skill for skill in self.technical_skills if has_skill(skill)]
             
             # Find soft skills
-            found_soft = []
-            for skill in self.soft_skills:
-                if skill.lower() in text_lower:
-                    found_soft.append(skill)
+            found_soft = [skill for skill in self.soft_skills if has_skill(skill)]
             
             return {
                 'technical_skills': found_technical,
@@ -128,61 +247,84 @@ class TextProcessor:
             logger.error(f"Error extracting skills: {str(e)}")
             return {'technical_skills': [], 'soft_skills': [], 'total_skills': 0}
     
-    def analyze_resume_job_match(self, resume_text: str, job_description: str) -> Dict:
+    def analyze_resume_job_match(self, resume_text: Union[str, AnalyzedText],
+                                 job_description: Union[str, AnalyzedText],
+                                 similarity: Optional[float] = None) -> Dict:
         """Analyze how well resume matches job description"""
         try:
-            # Calculate overall similarity
-            overall_similarity = self.calculate_text_similarity(resume_text, job_description)
-            
-            # Extract skills from both texts
-            resume_skills = self.extract_skills(resume_text)
-            job_skills = self.extract_skills(job_description)
-            
-            # Calculate skill match percentage
-            job_technical_skills = set(skill.lower() for skill in job_skills['technical_skills'])
-            resume_technical_skills = set(skill.lower() for skill in resume_skills['technical_skills'])
-            
-            if job_technical_skills:
-                technical_match = len(job_technical_skills.intersection(resume_technical_skills)) / len(job_technical_skills)
-            else:
-                technical_match = 0.0
-            
-            job_soft_skills = set(skill.lower() for skill in job_skills['soft_skills'])
-            resume_soft_skills = set(skill.lower() for skill in resume_skills['soft_skills'])
-            
-            if job_soft_skills:
-                soft_match = len(job_soft_skills.intersection(resume_soft_skills)) / len(job_soft_skills)
-            else:
-                soft_match = 0.0
-            
-            # Calculate weighted match score
-            match_score = (
-                overall_similarity * 0.4 +
-                technical_match * 0.4 +
-                soft_match * 0.2
-            ) * 100
-            
-            return {
-                'overall_similarity': round(overall_similarity, 4),
-                'technical_match': round(technical_match, 4),
-                'soft_match': round(soft_match, 4),
-                'match_score': round(match_score, 2),
-                'resume_skills': resume_skills,
-                'job_skills': job_skills,
-                'matching_technical_skills': list(job_technical_skills.intersection(resume_technical_skills)),
-                'matching_soft_skills': list(job_soft_skills.intersection(resume_soft_skills)),
-                'missing_technical_skills': list(job_technical_skills - resume_technical_skills),
-                'missing_soft_skills': list(job_soft_skills - resume_soft_skills)
-            }
+            # Callers get their own copy so they can't mutate the cached result
+            return copy.deepcopy(self._resume_job_match(resume_text, job_description, similarity))
         except Exception as e:
             logger.error(f"Error analyzing resume-job match: {str(e)}")
             return {'match_score': 0.0, 'error': str(e)}
     
-    def analyze_transcript_job_match(self, transcript: str, job_description: str) -> Dict:
+    @cachedmethod(attrgetter('_match_cache'), key=_match_key, lock=attrgetter('_cache_lock'))
+    def _resume_job_match(self, resume_text: Union[str, AnalyzedText],
+                          job_description: Union[str, AnalyzedText],
+                          similarity: Optional[float] = None) -> Dict:
+        """Memoized resume-job match; raises on failure so errors are never cached"""
+        resume_text = AnalyzedText.of(resume_text)
+        job_description = AnalyzedText.of(job_description)
+        
+        # Calculate overall similarity unless the caller already has it
+        overall_similarity = similarity
+        if overall_similarity is None:
+            overall_similarity = self.calculate_text_similarity(resume_text.raw, job_description.raw)
+        
+        # Extract skills from both texts
+        resume_skills = self.extract_skills(resume_text)
+        job_skills = self.extract_skills(job_description)
+        
+        # Calculate skill match percentage (extracted skills are already lowercase)
+        job_technical_skills = set(job_skills['technical_skills'])
+        resume_technical_skills = set(resume_skills['technical_skills'])
+        matching_technical_skills = job_technical_skills & resume_technical_skills
+        
+        if job_technical_skills:
+            technical_match = len(matching_technical_skills) / len(job_technical_skills)
+        else:
+            technical_match = 0.0
+        
+        job_soft_skills = set(job_skills['soft_skills'])
+        resume_soft_skills = set(resume_skills['soft_skills'])
+        matching_soft_skills = job_soft_skills & resume_soft_skills
+        
+        if job_soft_skills:
+            soft_match = len(matching_soft_skills) / len(job_soft_skills)
+        else:
+            soft_match = 0.0
+        
+        # Calculate weighted match score
+        match_score = (
+            overall_similarity * 0.4 +
+            technical_match * 0.4 +
+            soft_match * 0.2
+        ) * 100
+        
+        return {
+            'overall_similarity': round(overall_similarity, 4),
+            'technical_match': round(technical_match, 4),
+            'soft_match': round(soft_match, 4),
+            'match_score': round(match_score, 2),
+            'resume_skills': resume_skills,
+            'job_skills': job_skills,
+            'matching_technical_skills': list(matching_technical_skills),
+            'matching_soft_skills': list(matching_soft_skills),
+            'missing_technical_skills': list(job_technical_skills - resume_technical_skills),
+            'missing_soft_skills': list(job_soft_skills - resume_soft_skills)
+        }
+    
+    def analyze_transcript_job_match(self, transcript: Union[str, AnalyzedText],
+                                     job_description: Union[str, AnalyzedText],
+                                     similarity: Optional[float] = None) -> Dict:
         """Analyze how well interview transcript matches job description"""
         try:
-            # Calculate similarity between transcript and job description
-            similarity = self.calculate_text_similarity(transcript, job_description)
+            transcript = AnalyzedText.of(transcript)
+            job_description = AnalyzedText.of(job_description)
+            
+            # Calculate similarity between transcript and job description unless given
+            if similarity is None:
+                similarity = self.calculate_text_similarity(transcript.raw, job_description.raw)
             
             # Extract skills mentioned in transcript
             transcript_skills = self.extract_skills(transcript)
@@ -208,46 +350,68 @@ class TextProcessor:
     def get_leetcode_stats(self, username: str) -> Dict:
         """Get LeetCode statistics for a user (placeholder implementation)"""
         try:
-            # Placeholder implementation - replace with actual LeetCode API call
-            # Note: LeetCode doesn't have an official public API
-            # You might need to use web scraping or third-party APIs
-            
-            # Mock data for demonstration
-            mock_stats = {
-                'username': username,
-                'total_solved': 150,
-                'easy_solved': 80,
-                'medium_solved': 55,
-                'hard_solved': 15,
-                'acceptance_rate': 65.5,
-                'ranking': 25000,
-                'coding_score': 75.0  # Calculated based on problems solved
-            }
-            
-            return mock_stats
+            # Callers get their own copy so they can't mutate the cached result
+            return dict(self._fetch_leetcode_stats(username))
         except Exception as e:
             logger.error(f"Error getting LeetCode stats: {str(e)}")
             return {'coding_score': 0.0, 'error': str(e)}
     
+    @cachedmethod(attrgetter('_leetcode_cache'), lock=attrgetter('_cache_lock'))
+    def _fetch_leetcode_stats(self, username: str) -> Dict:
+        """Memoized LeetCode lookup; raises on failure so errors are never cached"""
+        # Placeholder implementation - replace with actual LeetCode API call
+        # Note: LeetCode doesn't have an official public API
+        # You might need to use web scraping or third-party APIs
+        
+        # Mock data for demonstration
+        mock_stats = {
+            'username': username,
+            'total_solved': 150,
+            'easy_solved': 80,
+            'medium_solved': 55,
+            'hard_solved': 15,
+            'acceptance_rate': 65.5,
+            'ranking': 25000,
+            'coding_score': 75.0  # Calculated based on problems solved
+        }
+        
+        return mock_stats
+    
     def process_text_analysis(self, resume_path: str, job_description: str, 
                             transcript: str = "", leetcode_username: str = "") -> Dict:
         """Comprehensive text analysis combining all components"""
         try:
-            # Extract resume text
-            resume_text = self.extract_text_from_file(resume_path) if resume_path else ""
-            
-            # Analyze resume-job match
-            resume_analysis = self.analyze_resume_job_match(resume_text, job_description)
-            
-            # Analyze transcript-job match if transcript is provided
-            transcript_analysis = {}
-            if transcript.strip():
-                transcript_analysis = self.analyze_transcript_job_match(transcript, job_description)
-            
-            # Get LeetCode stats if username is provided
-            leetcode_stats = {}
-            if leetcode_username.strip():
-                leetcode_stats = self.get_leetcode_stats(leetcode_username)
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                # Start the network-bound LeetCode lookup first so it overlaps the text work
+                leetcode_future = None
+                if leetcode_username.strip():
+                    leetcode_future = executor.submit(self.get_leetcode_stats, leetcode_username)
+                
+                # Extract resume text
+                resume_text = self.extract_text_from_file(resume_path) if resume_path else ""
+                
+                # Score resume and transcript against the job description in one pass
+                resume_similarity, transcript_similarity = self.calculate_text_similarities(
+                    job_description, [resume_text, transcript]
+                )
+                
+                # Lowercase the job description once for both skill matches
+                analyzed_job = AnalyzedText.of(job_description)
+                
+                # Analyze resume-job and, if a transcript is provided, transcript-job match
+                resume_future = executor.submit(
+                    self.analyze_resume_job_match, resume_text, analyzed_job, similarity=resume_similarity
+                )
+                transcript_future = None
+                if transcript.strip():
+                    transcript_future = executor.submit(
+                        self.analyze_transcript_job_match, transcript, analyzed_job,
+                        similarity=transcript_similarity
+                    )
+                
+                resume_analysis = resume_future.result()
+                transcript_analysis = transcript_future.result() if transcript_future else {}
+                leetcode_stats = leetcode_future.result() if leetcode_future else {}
             
             # Calculate overall text score
             resume_weight = 0.5
@@ -271,6 +435,22 @@ class TextProcessor:
             logger.error(f"Error in text analysis: {str(e)}")
             return {'error': str(e), 'overall_text_score': 0.0}
     
+    def process_resume_batch(self, resume_paths: List[str], job_description: str) -> List[Dict]:
+        """Screen many resumes against one job description"""
+        try:
+            # Parse files across cores, then score all resumes in one pass
+            resume_texts = self.extract_texts_from_files(resume_paths)
+            similarities = self.calculate_text_similarities(job_description, resume_texts)
+            analyzed_job = AnalyzedText.of(job_description)
+            
+            return [
+                self.analyze_resume_job_match(resume_text, analyzed_job, similarity=similarity)
+                for resume_text, similarity in zip(resume_texts, similarities)
+            ]
+        except Exception as e:
+            logger.error(f"Error in batch resume analysis: {str(e)}")
+            return [{'match_score': 0.0, 'error': str(e)} for _ in resume_paths]
+    
     def _get_skill_match_level(self, score: float) -> str:
         """Get skill match level description based on score"""
         if score >= 85:
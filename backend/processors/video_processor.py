@@ -6,140 +6,479 @@ Extracts frames from video and analyzes facial emotions using CNN model
 import cv2
 import os
 import numpy as np
-import tempfile
-from typing import Dict, List, Tuple
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# FFmpeg decoding on the GPU's NVDEC engine; optional. The import itself raises
+# RuntimeError when the ffmpeg/ffprobe binaries are not on PATH
+try:
+    import ffmpegcv  # type: ignore
+except Exception:
+    ffmpegcv = None
+
+# Marks the end of the decoded frame stream on the prefetch queue
+_END_OF_FRAMES = object()
+
+class TensorRTClassifier:
+    """
+    Runs a serialized TensorRT engine of the emotion CNN on the GPU
+    Build the engine from Code/convert_model.py's emotion.onnx with FP16 kernels, FP16 input
+    and an optimization profile covering batches of up to 256 faces:
+    trtexec --onnx=emotion.onnx --saveEngine=emotion.trt --fp16 --inputIOFormats=fp16:chw
+            --minShapes=input:1x1x48x48 --optShapes=input:64x1x48x48 --maxShapes=input:256x1x48x48
+    Larger batches are split into chunks of the profile's maximum batch size
+    """
+
+    def __init__(self, engine_path: str):
+        """Deserialize the engine and set up a CUDA context and stream"""
+        import tensorrt as trt  # type: ignore
+        import pycuda.driver as cuda  # type: ignore
+
+        self._cuda = cuda
+        cuda.init()
+        # Own context, pushed around each call, so inference works from any thread
+        self._context = cuda.Device(0).make_context()
+        try:
+            with open(engine_path, 'rb') as f, trt.Runtime(trt.Logger(trt.Logger.WARNING)) as runtime:
+                self.engine = runtime.deserialize_cuda_engine(f.read())
+            self.execution_context = self.engine.create_execution_context()
+            self.stream = cuda.Stream()
+            self.input_dtype = trt.nptype(self.engine.get_binding_dtype(0))
+            # Per-sample input shape: (1, 48, 48) for NCHW exports, (48, 48, 1) for older NHWC ones
+            self.sample_shape = tuple(self.engine.get_binding_shape(0))[1:]
+            # Largest batch the engine accepts: the profile's max for a dynamic batch dimension
+            batch_dim = self.engine.get_binding_shape(0)[0]
+            self.max_batch_size = batch_dim if batch_dim > 0 else self.engine.get_profile_shape(0, 0)[2][0]
+            self.output_dtype = trt.nptype(self.engine.get_binding_dtype(1))
+        finally:
+            self._context.pop()
+
+        self._capacity = 0
+        self._d_input = None
+        self._d_output = None
+
+    def _allocate(self, batch_size: int, num_classes: int):
+        """Grow the device buffers to hold batch_size samples"""
+        self._d_input = self._cuda.mem_alloc(batch_size * 48 * 48 * np.dtype(self.input_dtype).itemsize)
+        self._d_output = self._cuda.mem_alloc(batch_size * num_classes * np.dtype(self.output_dtype).itemsize)
+        self._capacity = batch_size
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """Run a (N, 1, 48, 48) batch with one host-to-device and one device-to-host copy"""
+        batch = np.ascontiguousarray(batch, dtype=self.input_dtype).reshape((-1,) + self.sample_shape)
+        self._context.push()
+        try:
+            if not self.execution_context.set_binding_shape(0, batch.shape):
+                raise ValueError(f"Batch shape {batch.shape} is outside the engine's optimization profile "
+                                 f"(max batch {self.max_batch_size})")
+            output = np.empty(tuple(self.execution_context.get_binding_shape(1)), dtype=self.output_dtype)
+            if batch.shape[0] > self._capacity:
+                self._allocate(batch.shape[0], output.shape[-1])
+
+            self._cuda.memcpy_htod_async(self._d_input, batch, self.stream)
+            self.execution_context.execute_async_v2(
+                bindings=[int(self._d_input), int(self._d_output)],
+                stream_handle=self.stream.handle
+            )
+            self._cuda.memcpy_dtoh_async(output, self._d_output, self.stream)
+            self.stream.synchronize()
+            return output
+        finally:
+            self._context.pop()
+
+
+class OnnxClassifier:
+    """
+    Runs the emotion CNN exported to ONNX (see Code/convert_model.py) on ONNX Runtime
+    Uses the CUDA execution provider when onnxruntime-gpu is installed, CPU otherwise
+    """
+
+    def __init__(self, onnx_path: str):
+        """Create the inference session once and look up its input name"""
+        import onnxruntime as ort  # type: ignore
+
+        available = ort.get_available_providers()
+        providers = [p for p in ('CUDAExecutionProvider', 'CPUExecutionProvider') if p in available]
+        self.session = ort.InferenceSession(onnx_path, providers=providers)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_dtype = np.float16 if model_input.type == 'tensor(float16)' else np.float32
+        # Per-sample input shape: (1, 48, 48) for NCHW exports, (48, 48, 1) for older NHWC ones
+        self.sample_shape = tuple(model_input.shape[1:])
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """Run a (N, 1, 48, 48) batch in a single session call"""
+        batch = np.ascontiguousarray(batch, dtype=self.input_dtype).reshape((-1,) + self.sample_shape)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
 class VideoProcessor:
-    def __init__(self, model_path: str = None, cascade_path: str = None):
+    def __init__(self, model_path: str = None, cascade_path: str = None, engine_path: str = None,
+                 face_detector_path: str = None):
         """Initialize video processor with model and cascade classifier"""
         self.emotion_labels = ['Angry', 'Disgust', 'Fear', 'Happy', 'Neutral', 'Sad', 'Surprise']
+        
+        # Label indices of each sentiment group, for summing the label histogram
+        self.positive_idx = [self.emotion_labels.index(label) for label in ('Happy', 'Surprise')]
+        self.negative_idx = [self.emotion_labels.index(label) for label in ('Angry', 'Disgust', 'Fear', 'Sad')]
+        self.neutral_idx = [self.emotion_labels.index('Neutral')]
+        
+        # Load face classifier
+        if not (cascade_path and os.path.exists(cascade_path)):
+            # Try default OpenCV cascade
+            cv2_base_dir = os.path.dirname(os.path.abspath(cv2.__file__))
+            cascade_path = os.path.join(cv2_base_dir, 'data/haarcascade_frontalface_default.xml')
+        self.cascade_path = cascade_path
+        self.face_classifier = cv2.CascadeClassifier(cascade_path)
+        
+        # Faces are detected on a copy downscaled to at most this many pixels per side
+        self.detection_max_side = 480
+        
+        # Prefer the YuNet DNN face detector (on CUDA when OpenCV was built with it) over Haar
+        self.detector_on_cuda = False
+        self.face_detector = None
+        self.face_detector_path = face_detector_path
+        if face_detector_path and os.path.exists(face_detector_path):
+            try:
+                self.detector_on_cuda = cv2.cuda.getCudaEnabledDeviceCount() > 0
+                self.face_detector = self._create_face_detector(face_detector_path)
+                logger.info(f"Using YuNet face detector {face_detector_path}")
+            except Exception as e:
+                logger.warning(f"YuNet face detector unavailable, falling back to Haar cascade: {e}")
+        
+        # Face detection runs on a thread pool kept for the processor's lifetime, so each
+        # worker's detectors are built once rather than per video. OpenCV detectors are not
+        # safe to share between threads; the first worker takes the ones built above and the
+        # others lazily build their own copies
+        self.detection_workers = os.cpu_count() or 1
+        if self.face_detector is not None:
+            # One GPU serializes the work anyway, and OpenCV DNN already threads on CPU;
+            # more workers would only multiply the detector copies
+            self.detection_workers = 1 if self.detector_on_cuda else min(self.detection_workers, 2)
+        self._detection_pool = ThreadPoolExecutor(max_workers=self.detection_workers,
+                                                  thread_name_prefix='face-detect')
+        self._thread_local = threading.local()
+        self._unclaimed_face_models = (self.face_classifier, self.face_detector)
+        self._face_models_lock = threading.Lock()
+        
+        # Faces per direct call into the Keras model
+        self.keras_batch_size = 256
+        
+        # Prefer a TensorRT engine on CUDA hosts, then an ONNX model on ONNX Runtime, then Keras
+        self.trt_classifier = None
+        self.onnx_classifier = None
+        self.classifier = None
+        if engine_path and os.path.exists(engine_path):
+            try:
+                self.trt_classifier = TensorRTClassifier(engine_path)
+                logger.info(f"Using TensorRT engine {engine_path} for emotion inference")
+            except Exception as e:
+                logger.warning(f"TensorRT engine unavailable, falling back to MODEL_PATH: {e}")
+        
+        # Load emotion detection model
+        if self.trt_classifier is None:
+            if not (model_path and os.path.exists(model_path)):
+                raise FileNotFoundError("Emotion detection model not found")
+            
+            if model_path.endswith('.onnx'):
+                self.onnx_classifier = OnnxClassifier(model_path)
+                logger.info(f"Using ONNX Runtime providers {self.onnx_classifier.session.get_providers()} for emotion inference")
+            else:
+                self.classifier = self._load_keras_model(model_path)
+        
+        # Build face batches directly in the dtype the inference runtime consumes
+        runtime = self.trt_classifier or self.onnx_classifier
+        self.batch_dtype = runtime.input_dtype if runtime is not None else np.float32
+    
+    def _create_face_detector(self, face_detector_path: str):
+        """Create a YuNet detector, targeting CUDA FP16 when a CUDA device is available"""
+        backend_id, target_id = cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_CPU
+        if self.detector_on_cuda:
+            backend_id, target_id = cv2.dnn.DNN_BACKEND_CUDA, cv2.dnn.DNN_TARGET_CUDA_FP16
+        
+        # The input size is set per frame in _detect_faces
+        return cv2.FaceDetectorYN.create(face_detector_path, "", (320, 320), score_threshold=0.9,
+                                         nms_threshold=0.3, top_k=5000,
+                                         backend_id=backend_id, target_id=target_id)
+    
+    def _face_models(self) -> Tuple:
+        """This thread's (cascade, YuNet detector or None) pair"""
+        models = getattr(self._thread_local, 'face_models', None)
+        if models is None:
+            # Reuse the detectors built in __init__ for the first thread that asks
+            with self._face_models_lock:
+                models, self._unclaimed_face_models = self._unclaimed_face_models, None
+            if models is None:
+                detector = None
+                if self.face_detector is not None:
+                    detector = self._create_face_detector(self.face_detector_path)
+                models = (cv2.CascadeClassifier(self.cascade_path), detector)
+            self._thread_local.face_models = models
+        return models
+    
+    def _to_gray(self, frame: np.ndarray) -> np.ndarray:
+        """Grayscale view of a frame, converting BGR into a buffer reused by this thread"""
+        # Decoder-converted gray frames may come as (H, W, 1); drop the channel axis
+        if frame.ndim == 2 or frame.shape[-1] == 1:
+            return frame.reshape(frame.shape[:2])
+        
+        # Crops are resized copies, so the buffer can be overwritten by the next frame
+        gray = getattr(self._thread_local, 'gray', None)
+        if gray is None or gray.shape != frame.shape[:2]:
+            gray = np.empty(frame.shape[:2], dtype=np.uint8)
+            self._thread_local.gray = gray
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray)
+    
+    def _detect_faces(self, frame: np.ndarray, gray: np.ndarray) -> np.ndarray:
+        """Return full-resolution (x, y, w, h) face boxes, from YuNet on the BGR frame or Haar on the gray one"""
+        # Detector cost scales with pixels, so detect on a downscaled copy and map boxes back
+        image = frame if self.face_detector is not None else gray
+        scale = min(1.0, self.detection_max_side / max(image.shape[:2]))
+        if scale < 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        
+        boxes = self._run_face_detector(image)
+        if scale < 1.0 and len(boxes):
+            boxes = np.round(np.asarray(boxes) / scale).astype(np.int32)
+        return boxes
+    
+    def _run_face_detector(self, image: np.ndarray) -> np.ndarray:
+        """Run YuNet on a BGR image, or the Haar cascade on a grayscale one"""
+        face_classifier, face_detector = self._face_models()
+        if face_detector is None:
+            return face_classifier.detectMultiScale(image, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+        
+        height, width = image.shape[:2]
+        face_detector.setInputSize((width, height))
+        _, faces = face_detector.detect(image)
+        if faces is None:
+            return np.empty((0, 4), dtype=np.int32)
+        
+        # Rows are box, five landmarks and score; boxes can start slightly outside the frame
+        boxes = faces[:, :4].astype(np.int32)
+        boxes[:, :2] = np.maximum(boxes[:, :2], 0)
+        return boxes
+    
+    def _load_keras_model(self, model_path: str):
+        """Load the Keras emotion model, importing Keras only when it is needed"""
         # Lazy imports for Keras to avoid hard dependency at module import time
         try:
+            import tensorflow as tf  # type: ignore
             from keras.models import load_model  # type: ignore
-            from keras.preprocessing.image import img_to_array  # type: ignore
-            self._load_model = load_model
-            self._img_to_array = img_to_array
         except Exception as e:
             # Raise a clear error which will be caught by the app and degrade gracefully
             raise ImportError("Keras/TensorFlow not installed. Please install tensorflow and keras to enable video processing.") from e
         
-        # Load face classifier
-        if cascade_path and os.path.exists(cascade_path):
-            self.face_classifier = cv2.CascadeClassifier(cascade_path)
-        else:
-            # Try default OpenCV cascade
-            cv2_base_dir = os.path.dirname(os.path.abspath(cv2.__file__))
-            default_path = os.path.join(cv2_base_dir, 'data/haarcascade_frontalface_default.xml')
-            self.face_classifier = cv2.CascadeClassifier(default_path)
+        classifier = load_model(model_path)
         
-        # Load emotion detection model
-        if model_path and os.path.exists(model_path):
-            self.classifier = self._load_model(model_path)
-        else:
-            raise FileNotFoundError("Emotion detection model not found")
+        # Call the model directly inside a graph traced once for any batch size, skipping
+        # predict()'s per-call setup and retracing on new batch shapes
+        self._keras_infer = tf.function(
+            lambda x: classifier(x, training=False),
+            input_signature=[tf.TensorSpec([None, 48, 48, 1], tf.float32)]
+        )
+        return classifier
+    
+    def _predict(self, batch: np.ndarray) -> np.ndarray:
+        """Run emotion inference on a (N, 1, 48, 48) NCHW batch"""
+        if self.trt_classifier is not None:
+            # The engine only accepts batches up to its profile's maximum
+            step = self.trt_classifier.max_batch_size
+            return np.concatenate([
+                self.trt_classifier.predict(batch[start:start + step])
+                for start in range(0, len(batch), step)
+            ])
+        if self.onnx_classifier is not None:
+            return self.onnx_classifier.predict(batch)
+        # The Keras model is channels-last; with one channel that is only a reshape, not a transpose
+        batch = batch.reshape(-1, 48, 48, 1)
+        # Chunked so activations for a whole video's faces never have to fit in memory at once
+        step = self.keras_batch_size
+        return np.concatenate([
+            self._keras_infer(batch[start:start + step]).numpy()
+            for start in range(0, len(batch), step)
+        ])
+    
+    def _normalize_rois(self, rois: np.ndarray) -> np.ndarray:
+        """Scale stacked (N, 48, 48) uint8 face crops to a contiguous (N, 1, 48, 48) batch in [0, 1]"""
+        # Cast and scale in one pass; FP16 engines get half the bytes, and argmax is unaffected
+        return np.multiply(rois[:, np.newaxis], 1.0 / 255.0, dtype=self.batch_dtype)
     
-    def extract_frames(self, video_path: str, frame_rate: int = 3) -> List[str]:
-        """Extract frames from video at specified frame rate"""
-        temp_dir = tempfile.mkdtemp()
-        frame_paths = []
+    def _open_video(self, video_path: str):
+        """
+        Open a video for decoding on NVDEC when ffmpegcv and a GPU are available, else with OpenCV
+        VideoCaptureNV asserts when no NVIDIA GPU is present, which also falls back to OpenCV
+        """
+        if ffmpegcv is not None:
+            try:
+                # The Haar path only needs luma, so let the decoder output gray frames directly
+                pix_fmt = 'bgr24' if self.face_detector is not None else 'gray'
+                return ffmpegcv.VideoCaptureNV(video_path, pix_fmt=pix_fmt)
+            except Exception as e:
+                logger.warning(f"NVDEC decoding unavailable, falling back to OpenCV: {e}")
+        
+        # Request the FFmpeg backend explicitly: it decodes without holding the GIL, so the
+        # prefetch thread overlaps face detection; builds without FFmpeg use the default backend
+        if cv2.videoio_registry.hasBackend(cv2.CAP_FFMPEG):
+            return cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
+        return cv2.VideoCapture(video_path)
+    
+    def extract_frames(self, video_path: str, frame_rate: int = 3) -> Iterator[np.ndarray]:
+        """Yield BGR (or decoder-converted grayscale) frames from video at specified frame rate, kept in memory"""
+        cap = self._open_video(video_path)
         
         try:
-            cap = cv2.VideoCapture(video_path)
             if not cap.isOpened():
                 raise ValueError("Could not open video file")
             
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_interval = int(fps / frame_rate) if fps > 0 else 30
+            # ffmpegcv readers expose fps directly; OpenCV captures through get()
+            fps = getattr(cap, 'fps', None) or cap.get(cv2.CAP_PROP_FPS)
+            frame_interval = max(1, int(fps / frame_rate)) if fps > 0 else 30
             frame_number = 0
             
+            # OpenCV captures advance past skipped frames with grab() and only convert and copy
+            # out the sampled ones with retrieve(); ffmpegcv readers only offer read()
+            skip_unsampled = isinstance(cap, cv2.VideoCapture)
+            
             while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                if frame_number % frame_interval == 0:
-                    frame_path = os.path.join(temp_dir, f'frame_{frame_number}.jpg')
-                    cv2.imwrite(frame_path, frame)
-                    frame_paths.append(frame_path)
+                if skip_unsampled:
+                    if not cap.grab():
+                        break
+                    if frame_number % frame_interval == 0:
+                        ret, frame = cap.retrieve()
+                        if ret:
+                            yield frame
+                else:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    if frame_number % frame_interval == 0:
+                        yield frame
                 
                 frame_number += 1
             
-            cap.release()
-            return frame_paths
-            
         except Exception as e:
             logger.error(f"Error extracting frames: {str(e)}")
             raise
+        finally:
+            cap.release()
     
-    def detect_emotions_in_frame(self, frame_path: str) -> List[str]:
-        """Detect emotions in a single frame"""
-        emotions = []
+    def prefetch_frames(self, video_path: str, frame_rate: int = 3, max_buffered: int = 8) -> Iterator[np.ndarray]:
+        """Yield the frames of extract_frames while a background thread decodes up to max_buffered ahead"""
+        frames = queue.Queue(maxsize=max_buffered)
+        stop = threading.Event()
+        
+        def produce():
+            try:
+                for frame in self.extract_frames(video_path, frame_rate):
+                    if stop.is_set():
+                        return
+                    frames.put(frame)
+                frames.put(_END_OF_FRAMES)
+            except Exception as e:
+                frames.put(e)
+        
+        producer = threading.Thread(target=produce, name="frame-decoder", daemon=True)
+        producer.start()
         
         try:
-            frame = cv2.imread(frame_path)
-            if frame is None:
-                return emotions
-            
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_classifier.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5)
+            while True:
+                item = frames.get()
+                if item is _END_OF_FRAMES:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Drain so a producer blocked on a full queue can see the stop flag and exit
+            stop.set()
+            while producer.is_alive():
+                try:
+                    frames.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+    
+    def extract_face_rois(self, frame: np.ndarray) -> np.ndarray:
+        """Detect faces in a BGR or grayscale frame and return them as stacked (N, 48, 48) uint8 grayscale crops"""
+        try:
+            gray = self._to_gray(frame)
+            faces = self._detect_faces(frame, gray)
             
+            # Resize each face straight into its slot of the preallocated stack
+            rois = np.empty((len(faces), 48, 48), dtype=np.uint8)
+            kept = 0
             for (x, y, w, h) in faces:
-                roi_gray = gray[y:y + h, x:x + w]
-                roi_gray = cv2.resize(roi_gray, (48, 48), interpolation=cv2.INTER_AREA)
+                cv2.resize(gray[y:y + h, x:x + w], (48, 48), dst=rois[kept], interpolation=cv2.INTER_AREA)
                 
-                if np.sum([roi_gray]) != 0:
-                    roi = roi_gray.astype('float') / 255.0
-                    roi = self._img_to_array(roi)
-                    roi = np.expand_dims(roi, axis=0)
-                    
-                    prediction = self.classifier.predict(roi)[0]
-                    emotion = self.emotion_labels[prediction.argmax()]
-                    emotions.append(emotion)
+                # Skip blank crops; any() stops at the first nonzero pixel
+                if rois[kept].any():
+                    kept += 1
+            
+            return rois[:kept]
+            
+        except Exception as e:
+            logger.error(f"Error extracting faces from frame: {str(e)}")
+            return np.empty((0, 48, 48), dtype=np.uint8)
+    
+    def detect_emotions_in_frame(self, frame: np.ndarray) -> List[str]:
+        """Detect emotions in a single BGR frame"""
+        try:
+            rois = self.extract_face_rois(frame)
+            if len(rois) == 0:
+                return []
             
-            return emotions
+            predictions = self._predict(self._normalize_rois(rois))
+            return [self.emotion_labels[i] for i in predictions.argmax(axis=1)]
             
         except Exception as e:
-            logger.error(f"Error detecting emotions in frame {frame_path}: {str(e)}")
-            return emotions
+            logger.error(f"Error detecting emotions in frame: {str(e)}")
+            return []
+    
+    def _collect_face_rois(self, video_path: str) -> List[np.ndarray]:
+        """Detect faces in every sampled frame on the thread pool, returning per-frame crops in order"""
+        roi_batches = []
+        # Bound the in-flight frames so the decoder's backpressure still limits memory
+        max_pending = 2 * self.detection_workers
+        
+        pending = deque()
+        for frame in self.prefetch_frames(video_path):
+            pending.append(self._detection_pool.submit(self.extract_face_rois, frame))
+            if len(pending) >= max_pending:
+                roi_batches.append(pending.popleft().result())
+        roi_batches.extend(future.result() for future in pending)
+        
+        return roi_batches
     
     def process_video(self, video_path: str) -> Dict:
         """Process entire video and return emotion analysis"""
         try:
-            # Extract frames
-            frame_paths = self.extract_frames(video_path)
+            # Collect face crops from every sampled frame so the CNN runs once over all of them;
+            # decoding continues on a background thread while detection runs on a thread pool
+            roi_batches = self._collect_face_rois(video_path)
             
-            if not frame_paths:
+            if not roi_batches:
                 return {"error": "No frames extracted from video"}
             
-            # Initialize emotion counts
-            emotion_count = {label: 0 for label in self.emotion_labels}
-            total_faces = 0
-            
-            # Process each frame
-            for frame_path in frame_paths:
-                emotions = self.detect_emotions_in_frame(frame_path)
-                for emotion in emotions:
-                    emotion_count[emotion] += 1
-                    total_faces += 1
-            
-            # Clean up temporary files
-            for frame_path in frame_paths:
-                try:
-                    os.remove(frame_path)
-                except:
-                    pass
-            
+            rois = np.concatenate(roi_batches)
+            total_faces = len(rois)
             if total_faces == 0:
                 return {"error": "No faces detected in video"}
             
+            # One batched inference call, then histogram the predicted labels
+            labels = self._predict(self._normalize_rois(rois)).argmax(axis=1)
+            counts = np.bincount(labels, minlength=len(self.emotion_labels))
+            emotion_count = dict(zip(self.emotion_labels, counts.tolist()))
+            
             # Calculate scores
-            positive_emotions = emotion_count['Happy'] + emotion_count['Surprise']
-            negative_emotions = (emotion_count['Angry'] + emotion_count['Disgust'] + 
-                               emotion_count['Fear'] + emotion_count['Sad'])
-            neutral_emotions = emotion_count['Neutral']
+            positive_emotions = int(counts[self.positive_idx].sum())
+            negative_emotions = int(counts[self.negative_idx].sum())
+            neutral_emotions = int(counts[self.neutral_idx].sum())
             
             # Emotion score calculation (0-100 scale)
             emotion_score = self._calculate_emotion_score(positive_emotions, negative_emotions, neutral_emotions)
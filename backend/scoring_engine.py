@@ -3,6 +3,7 @@ Scoring Engine
 Combines all processor results into individual and cumulative scores with explanations
 """
 
+from bisect import bisect_right
 from typing import Dict, List
 import logging
 
@@ -65,27 +66,64 @@ class ScoringEngine:
                 }
             }
         }
-    
-    def get_score_explanation(self, score_type: str, score: float) -> Dict:
-        """Get explanation for a specific score"""
-        if score_type not in self.explanations:
-            return {'title': 'Unknown Score', 'description': '', 'interpretation': ''}
         
-        explanation = self.explanations[score_type]
-        interpretation = ''
+        # Bands are contiguous, so each score type reduces to sorted lower bounds for bisect;
+        # fractional scores between two bands (e.g. 79.5) fall into the lower one. The
+        # explanation dict for every band is built once here and shared, so treat it as read-only
+        self._range_tables = {}
+        for score_type, explanation in self.explanations.items():
+            bands = sorted(explanation['ranges'].items())
+            thresholds = [min_score for (min_score, _), _ in bands[1:]]
+            band_results = [
+                {
+                    'title': explanation['title'],
+                    'description': explanation['description'],
+                    'interpretation': desc
+                }
+                for _, desc in bands
+            ]
+            self._range_tables[score_type] = (thresholds, band_results)
+        self._unknown_explanation = {'title': 'Unknown Score', 'description': '', 'interpretation': ''}
+        
+        # Verdict bands by cumulative score, lowest first: (recommendation, color, summary)
+        self.verdict_thresholds = [55, 70, 85]
+        self.verdict_bands = [
+            ("NOT RECOMMENDED", "red", "This candidate may not be the best fit for this role at this time."),
+            ("CONDITIONAL", "orange", "This candidate has average qualifications with some areas needing attention."),
+            ("RECOMMENDED", "blue", "This candidate shows strong potential with good performance in most areas."),
+            ("HIGHLY RECOMMENDED", "green", "This candidate demonstrates exceptional qualifications across all evaluation criteria.")
+        ]
         
-        # Find the appropriate range interpretation
-        for (min_score, max_score), desc in explanation['ranges'].items():
-            if min_score <= score <= max_score:
-                interpretation = desc
-                break
+        # Strength noted for each individual score at or above 70, improvement below 50
+        self.strength_threshold = 70
+        self.score_strengths = {
+            'emotion_score': "Strong emotional intelligence and confidence",
+            'audio_score': "Excellent communication skills",
+            'text_score': "Good alignment with job requirements"
+        }
+        self.improvement_threshold = 50
+        self.score_improvements = {
+            'emotion_score': "Work on confidence and emotional regulation during interviews",
+            'audio_score': "Improve communication clarity and reduce hesitation",
+            'text_score': "Develop skills that better match job requirements"
+        }
         
-        return {
-            'title': explanation['title'],
-            'description': explanation['description'],
-            'interpretation': interpretation
+        # Summary insight for whichever individual score is highest
+        self.top_score_insights = {
+            'emotion_score': "Shows excellent emotional stability and confidence.",
+            'audio_score': "Demonstrates strong communication abilities.",
+            'text_score': "Has excellent skill alignment with the role."
         }
     
+    def get_score_explanation(self, score_type: str, score: float) -> Dict:
+        """Get explanation for a specific score"""
+        if score_type not in self._range_tables:
+            return self._unknown_explanation
+        
+        # Find the appropriate range's precomputed explanation
+        thresholds, band_results = self._range_tables[score_type]
+        return band_results[bisect_right(thresholds, score)]
+    
     def calculate_scores(self, video_results: Dict, audio_results: Dict, text_results: Dict) -> Dict:
         """Calculate individual and cumulative scores from processor results"""
         try:
@@ -142,28 +180,15 @@ class ScoringEngine:
             cumulative_score = scores['cumulative_score']['value']
             individual_scores = scores['individual_scores']
             
-            # Determine overall recommendation
-            if cumulative_score >= 85:
-                recommendation = "HIGHLY RECOMMENDED"
-                recommendation_color = "green"
-            elif cumulative_score >= 70:
-                recommendation = "RECOMMENDED"
-                recommendation_color = "blue"
-            elif cumulative_score >= 55:
-                recommendation = "CONDITIONAL"
-                recommendation_color = "orange"
-            else:
-                recommendation = "NOT RECOMMENDED"
-                recommendation_color = "red"
+            # Determine overall recommendation and the opening line of the summary
+            band = bisect_right(self.verdict_thresholds, cumulative_score)
+            recommendation, recommendation_color, verdict_summary = self.verdict_bands[band]
             
             # Identify strengths
-            strengths = []
-            if individual_scores['emotion_score']['value'] >= 70:
-                strengths.append("Strong emotional intelligence and confidence")
-            if individual_scores['audio_score']['value'] >= 70:
-                strengths.append("Excellent communication skills")
-            if individual_scores['text_score']['value'] >= 70:
-                strengths.append("Good alignment with job requirements")
+            strengths = [
+                strength for score_name, strength in self.score_strengths.items()
+                if individual_scores[score_name]['value'] >= self.strength_threshold
+            ]
             
             # Add specific strengths from detailed analysis
             if video_results.get('positive_count', 0) > video_results.get('negative_count', 0):
@@ -176,13 +201,10 @@ class ScoringEngine:
                 strengths.append("Strong technical skill alignment")
             
             # Identify areas for improvement
-            improvements = []
-            if individual_scores['emotion_score']['value'] < 50:
-                improvements.append("Work on confidence and emotional regulation during interviews")
-            if individual_scores['audio_score']['value'] < 50:
-                improvements.append("Improve communication clarity and reduce hesitation")
-            if individual_scores['text_score']['value'] < 50:
-                improvements.append("Develop skills that better match job requirements")
+            improvements = [
+                improvement for score_name, improvement in self.score_improvements.items()
+                if individual_scores[score_name]['value'] < self.improvement_threshold
+            ]
             
             # Add specific improvements from detailed analysis
             if audio_results.get('filler_analysis', {}).get('filler_count', 0) > 10:
@@ -193,30 +215,16 @@ class ScoringEngine:
                 improvements.append(f"Consider developing skills in: {', '.join(missing_skills[:3])}")
             
             # Generate summary
-            summary_parts = []
-            
-            if cumulative_score >= 85:
-                summary_parts.append("This candidate demonstrates exceptional qualifications across all evaluation criteria.")
-            elif cumulative_score >= 70:
-                summary_parts.append("This candidate shows strong potential with good performance in most areas.")
-            elif cumulative_score >= 55:
-                summary_parts.append("This candidate has average qualifications with some areas needing attention.")
-            else:
-                summary_parts.append("This candidate may not be the best fit for this role at this time.")
-            
-            # Add specific insights
-            highest_score = max(individual_scores.values(), key=lambda x: x['value'])
-            lowest_score = min(individual_scores.values(), key=lambda x: x['value'])
+            summary_parts = [verdict_summary]
             
+            # Add specific insights for the highest score (first one wins on ties)
+            best_name, best_value = None, float('-inf')
             for score_name, score_data in individual_scores.items():
-                if score_data == highest_score:
-                    if score_name == 'emotion_score':
-                        summary_parts.append("Shows excellent emotional stability and confidence.")
-                    elif score_name == 'audio_score':
-                        summary_parts.append("Demonstrates strong communication abilities.")
-                    elif score_name == 'text_score':
-                        summary_parts.append("Has excellent skill alignment with the role.")
-                    break
+                if score_data['value'] > best_value:
+                    best_name, best_value = score_name, score_data['value']
+            
+            if best_name in self.top_score_insights:
+                summary_parts.append(self.top_score_insights[best_name])
             
             summary = " ".join(summary_parts)
             